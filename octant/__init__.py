@@ -17,7 +17,7 @@ from .roms import nc_gls_dissipation, nc_N2, nc_curl, nc_div, \
                   nc_pstrain, nc_grid, nc_depths, nc_velocity
 from .seawater import psu2reference_salinity, o2_saturation, rho_stp
 from .slice import isoslice, zslice, iso_integrate, surface
-from .tools import rot2d, nanmask, shrink, plfilt, hgrad
+from .tools import rot2d, nanmask, shrink, plfilt, hgrad, points_inside_poly
 from .wvelocity import omegaHz_velocity, w_velocity
 
 
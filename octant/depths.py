@@ -24,11 +24,11 @@ S-coordinate:
 
 Wrapper functions:
     C = get_Vstretching(Vstretching, theta_s, theta_b, Hscale=None)
-    z = get_depths(Vtransform, C, h, hc)
+    z = get_depths(Vtransform, C, h, hc, dtype=None)
 
-    zw = get_zw(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3)
-    zrho = get_zrho(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3)
-    Hz = get_Hz(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3)
+    zw = get_zw(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3, dtype=None)
+    zrho = get_zrho(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3, dtype=None)
+    Hz = get_Hz(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3, dtype=None)
 
 Usage Examples
 --------------
@@ -65,7 +65,9 @@ import numpy as np
 
 def check_s_limits(Cwrapped):
     def C(s):
-        assert np.alltrue( (s >= -1.0) & (s <= 0.0) ), \
+        # Two reductions avoid a boolean temporary the size of s.  As an
+        # assert, the check is skipped altogether when run with python -O.
+        assert np.min(s) >= -1.0 and np.max(s) <= 0.0, \
             '-1.0 <= s <= 0.0 for valid Vstretching'
         return Cwrapped(s)
     return C
@@ -93,12 +95,25 @@ def get_Vstretching_1(theta_s, theta_b):
     assert 0 <  theta_s <= 8, 'theta_s not in valid range for Vstretching == 1'
     assert 0 <= theta_b <= 1, 'theta_b not in valid range for Vstretching == 1'
 
+    # Terms that do not depend on s are calculated once, here, as Python
+    # floats so they do not change the precision of s in C(s).
+    a = float(theta_s)
+    b = float(theta_b)
+    half_a = 0.5 * a
+    sinh_fac = float((1 - b) / np.sinh(a))
+    tanh_fac = float(0.5 * b / np.tanh(half_a))
+
     @check_s_limits
     def C(s):
-        a = theta_s
-        b = theta_b
-        return (1 - b) * (np.sinh(s * a) / np.sinh(a)) + \
-                b * (-0.5 + 0.5 * np.tanh(a * (s + 0.5)) / np.tanh(0.5 * a))
+        # a*s is shared by both terms, since a*(s + 0.5) = a*s + a/2, and
+        # a term with zero weight (b = 0 or b = 1) is not evaluated.
+        sa = a * s
+        if b == 0:
+            return sinh_fac * np.sinh(sa)
+        Cs = tanh_fac * np.tanh(sa + half_a) - 0.5 * b
+        if b < 1:
+            Cs += sinh_fac * np.sinh(sa)
+        return Cs
 
     C.__doc__ = get_Vstretching_1.__doc__
     C.__doc__ += '  -------------- Specified Parameters ----------\n'
@@ -130,9 +145,12 @@ def get_Vstretching_2(theta_s, theta_b):
     another function.
     '''
 
+    theta_s = float(theta_s)
+    cosh_fac = float(1.0 / (np.cosh(theta_s) - 1.0))
+
     @check_s_limits
     def C(s):
-        return (1.0 - np.cosh(theta_s * s)) / (np.cosh(theta_s) - 1.0)
+        return (1.0 - np.cosh(theta_s * s)) * cosh_fac
 
     C.__doc__ = get_Vstretching_2.__doc__
     C.__doc__ += '  -------------- Specified Parameters ----------\n'
@@ -181,13 +199,15 @@ def get_Vstretching_3(theta_s, theta_b, Hscale=3.0):
     assert 0.0 <  theta_s , 'theta_s must be positive for Vstretching == 3'
     assert 0.0 <= theta_b , 'theta_b must be positive for Vstretching == 3'
 
+    exp_sur = float(theta_s)
+    exp_bot = float(theta_b)
+    Hscale = float(Hscale)
+    log_fac = float(1.0 / np.log(np.cosh(Hscale)))
+
     @check_s_limits
     def C(s):
-        exp_sur = theta_s
-        exp_bot = theta_b
-
-        Cbot = np.log(np.cosh(Hscale * (s + 1.0)**exp_bot))/np.log(np.cosh(Hscale)) - 1.0
-        Csur = -np.log(np.cosh(Hscale * np.abs(s)**exp_sur))/np.log(np.cosh(Hscale))
+        Cbot = np.log(np.cosh(Hscale * (s + 1.0)**exp_bot)) * log_fac - 1.0
+        Csur = -np.log(np.cosh(Hscale * np.abs(s)**exp_sur)) * log_fac
         Cweight = 0.5 * (1.0 - np.tanh(Hscale * (s + 0.5)))
 
         return Cweight * Cbot + (1.0 - Cweight) * Csur
@@ -237,14 +257,21 @@ def get_Vstretching_4(theta_s, theta_b):
     assert 0.0 <=  theta_s <= 10.0, 'theta_s not in valid range for Vstretching == 4'
     assert 0.0 <= theta_b <= 3.0, 'theta_s not in valid range for Vstretching == 4'
 
+    theta_s = float(theta_s)
+    theta_b = float(theta_b)
+    if theta_s > 0:
+        cosh_fac = float(1.0 / (np.cosh(theta_s) - 1.0))
+    if theta_b > 0.0:
+        exp_fac = float(1.0 / (1.0 - np.exp(-theta_b)))
+
     @check_s_limits
     def C(s):
-        if theta_s>0:
-            C = (1.0 - np.cosh(theta_s * s)) / (np.cosh(theta_s) - 1.0)
+        if theta_s > 0:
+            C = (1.0 - np.cosh(theta_s * s)) * cosh_fac
         else:
             C = -(s*s)
         if theta_b > 0.0:
-            return (np.exp(theta_b * C) - 1.0) / (1.0 - np.exp(-theta_b))
+            return (np.exp(theta_b * C) - 1.0) * exp_fac
         else:
             return -C
 
@@ -304,15 +331,19 @@ def get_Vtransform_1(C, h, hc):
     The size of h defines the horizontal dimensions of the depths.
 
     '''
-    def Zo(s):
-        if np.ndim(h) == 1:
-            s = s[:, np.newaxis]
-        if np.ndim(h) == 2:
-            s = s[:, np.newaxis, np.newaxis]
+    # h is fixed, so its minimum is checked once here rather than in Zo
+    assert hc <= np.min(h), 'hc cannot be larger than the minimum depth'
 
-        assert hc <= np.min(h), 'hc cannot be larger than the minimum depth'
+    # Index that adds a trailing axis to s for each dimension of h
+    bcast = (Ellipsis,) + (np.newaxis,) * np.ndim(h)
 
-        return hc * (s - C(s)) + C(s) * h
+    def Zo(s):
+        # The s dependent terms, A = hc*(s - C) and B = C, are calculated
+        # on the 1D s vector before being broadcast against h.
+        s = np.asanyarray(s)
+        B = C(s)
+        A = hc * (s - B)
+        return A[bcast] + B[bcast] * h
 
     Zo.__doc__ = 'Return Zo based on Vtransform == 1\n'
     Zo.__doc__ += get_Vtransform_1.__doc__[1:]
@@ -341,14 +372,15 @@ def get_Vtransform_2(C, h, hc):
     The size of h defines the horizontal dimensions of the depths.
 
     '''
+    bcast = (Ellipsis,) + (np.newaxis,) * np.ndim(h)
 
     def Zo(s):
-        if np.ndim(h) == 1:
-            s = s[:, np.newaxis]
-        if np.ndim(h) == 2:
-            s = s[:, np.newaxis, np.newaxis]
-
-        return (hc * s + C(s) * h) / (hc + h)
+        # As for Vtransform == 1, A = hc*s and B = C are calculated on the
+        # 1D s vector before being broadcast against h.
+        s = np.asanyarray(s)
+        B = C(s)
+        A = hc * s
+        return (A[bcast] + B[bcast] * h) / (hc + h)
 
     Zo.__doc__ = 'Return Zo based on Vtransform == 2\n'
     Zo.__doc__ += get_Vtransform_2.__doc__[1:]
@@ -357,7 +389,14 @@ def get_Vtransform_2(C, h, hc):
 ######################################################################
 # Depths
 
-def get_depths(Vtransform, C, h, hc):
+def _astype(a, dtype):
+    'return a as an array of type dtype, or a unchanged if dtype is None'
+    if dtype is None:
+        return a
+    return np.asanyarray(a).astype(dtype, copy=False)
+
+
+def get_depths(Vtransform, C, h, hc, dtype=None):
     '''
     Return depths function associated with ocean model s-coordinate
 
@@ -373,6 +412,8 @@ def get_depths(Vtransform, C, h, hc):
             The water depth(s) at which to calculate the depths
     hc : float
             The critical depth that defines regions of enhanced vertical resolution
+    dtype : data-type, optional
+            The type of the depths.  [Default = None]
 
     Output
     ------
@@ -380,19 +421,38 @@ def get_depths(Vtransform, C, h, hc):
             A function that returns s-coordinate depths
     '''
 
+    # With dtype, the constants are scalars of that type, as numpy.ma
+    # promotes float32 masked arrays to float64 with Python numbers.
+    one = 1.0
+    if dtype is not None:
+        h = _astype(h, dtype)
+        hc = np.dtype(dtype).type(hc)
+        one = np.dtype(dtype).type(1)
+
     if Vtransform == 1:
+        # Zo and 1/h are set up once, so depths multiplies rather than divides
+        Zo = get_Vtransform_1(C, h, hc)
+        invh = one / np.asanyarray(h)
+
         def depths(s, zeta=0):
-            Zo = get_Vtransform_1(C, h, hc)
-            return Zo(s) + zeta * (1 + Zo(s)/h)
+            zo = Zo(_astype(s, dtype))
+            # The default, zeta = 0, needs no free surface term at all
+            if np.isscalar(zeta) and zeta == 0:
+                return zo
+            return zo + _astype(zeta, dtype) * (one + zo * invh)
 
         depths.__doc__ = 'Return depths(s, zeta=0) based on Vtransform == 1\n'
         depths.__doc__ += get_Vtransform_1.__doc__[1:]
         return depths
 
     elif Vtransform == 2:
+        Zo = get_Vtransform_2(C, h, hc)
+
         def depths(s, zeta=0):
-            Zo = get_Vtransform_2(C, h, hc)
-            return zeta + (zeta + h) * Zo(s)
+            if np.isscalar(zeta) and zeta == 0:
+                return h * Zo(_astype(s, dtype))
+            zeta = _astype(zeta, dtype)
+            return zeta + (zeta + h) * Zo(_astype(s, dtype))
 
         depths.__doc__ = 'Return depths(s, zeta=0) based on Vtransform == 2\n'
         depths.__doc__ += get_Vtransform_2.__doc__[1:]
@@ -426,24 +486,44 @@ def get_s(grid, N):
 ######################################################################
 # Wrapper functions
 
-def get_zw(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3):
+def get_zw(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3,
+           dtype=None):
     sw = get_sw(N)
     C = get_Vstretching(Vstretching, theta_s, theta_b, Hscale)
-    depths = get_depths(Vtransform, C, h, hc)
+    depths = get_depths(Vtransform, C, h, hc, dtype=dtype)
     return depths(sw, zeta)
 
 
-def get_zrho(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3):
+def get_zrho(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3,
+             dtype=None):
     srho = get_srho(N)
     C = get_Vstretching(Vstretching, theta_s, theta_b, Hscale)
-    depths = get_depths(Vtransform, C, h, hc)
+    depths = get_depths(Vtransform, C, h, hc, dtype=dtype)
     return depths(srho, zeta)
 
-def get_Hz(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3):
-    sw = get_sw(N+1)
+def get_Hz(Vtransform, Vstretching, N, theta_s, theta_b, h, hc, zeta=0, Hscale=3,
+           dtype=None):
+    sw = _astype(get_sw(N+1), dtype)
     C = get_Vstretching(Vstretching, theta_s, theta_b, Hscale)
-    depths = get_depths(Vtransform, C, h, hc)
-    return np.diff(depths(sw, zeta), axis=0)
+    if dtype is not None:
+        h = _astype(h, dtype)
+        hc = float(hc)
+        zeta = _astype(zeta, dtype)
+    # A zeta with a leading time axis gets an s axis after it, so that the
+    # thicknesses are returned along s for each time.
+    if np.ndim(zeta) > np.ndim(h):
+        zeta = np.asanyarray(zeta)[(Ellipsis, np.newaxis) +
+                                   (slice(None),)*np.ndim(h)]
+    # zeta enters the depths as a factor that is constant in s, so the
+    # thicknesses are found from the differences of Zo alone.
+    if Vtransform == 1:
+        dZo = np.diff(get_Vtransform_1(C, h, hc)(sw), axis=0)
+        return dZo * (1 + zeta / np.asanyarray(h))
+    elif Vtransform == 2:
+        dZo = np.diff(get_Vtransform_2(C, h, hc)(sw), axis=0)
+        return dZo * (zeta + h)
+    else:
+        raise Exception('Vtransform must be 1 or 2')
 
 
 
@@ -3,6 +3,8 @@ from __future__ import absolute_import, division, print_function
 import numpy as np
 import pyproj
 
+from .tools import points_inside_poly
+
 class CGrid(object):
     """Curvilinear Arakawa C-Grid
 
@@ -71,6 +73,7 @@ class CGrid(object):
 
         self._calculate_subgrids()
         self._calculate_metrics()
+        self._calculate_uv_metrics()
 
     def _calculate_subgrids(self):
         'Calculate rho, u, v, and psi grids from vertices grid'
@@ -128,6 +131,11 @@ class CGrid(object):
         self.angle = np.unwrap(np.unwrap(angle, axis=0), axis=1)
         self.angle_rho = self.angle
 
+    def _calculate_uv_metrics(self):
+        'Calculate pm at u-points and pn at v-points from pm and pn'
+        self.pm_u = 0.5*(self.pm[:,1:] + self.pm[:,:-1])
+        self.pn_v = 0.5*(self.pn[1:,:] + self.pn[:-1,:])
+
     def calculate_orthogonality(self):
         '''
         Calculate orthogonality error in radians
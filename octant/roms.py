@@ -1,12 +1,35 @@
 from __future__ import absolute_import, division, print_function
 
 from datetime import datetime
+import numbers
+import warnings
 
 import numpy as np
 import netCDF4
 
 from .depths import get_srho, get_sw, get_Vstretching, get_depths
 from .grid import CGrid, rho_to_vert
+from .tools import shrink
+
+# Index types that select a regular section of an array.  np.integer is
+# registered as a numbers.Integral, so numpy integer indices are included.
+_basic_index_types = (numbers.Integral, slice)
+
+
+def _normalize_index(idx):
+    '''Return a list or array of evenly spaced, increasing indices as a slice
+
+    netCDF4 reads each element of a list or array index separately, while a
+    slice is read with a single strided call.  Any other index is returned
+    unchanged.
+    '''
+    if isinstance(idx, (list, np.ndarray)):
+        a = np.asarray(idx)
+        if a.ndim == 1 and a.size > 1 and a.dtype.kind in 'iu':
+            step = a[1] - a[0]
+            if a[0] >= 0 and step > 0 and np.all(np.diff(a) == step):
+                return slice(int(a[0]), int(a[-1]) + 1, int(step))
+    return idx
 
 
 def nc_gls_dissipation(nc, tidx):
@@ -251,6 +274,8 @@ class nc_depths(object):
     zeta: array_like, optional
         The free surface, must be the same size as h in all but the leftmost dimension
         if zeta is a function of time.
+    dtype : data-type, optional
+        The type of the depths.  By default, the type of h and zeta in the file.
 
     Returns
     -------
@@ -262,12 +287,12 @@ class nc_depths(object):
         the values that are required will be retrieved from the file.
 
     """
-    def __init__(self, nc, grid, ncg=None):
+    def __init__(self, nc, grid, ncg=None, dtype=None):
 
-        # Open the netCDF file
+        # Grid variables (h) are read from ncg, if it is given
         self.nc = nc
-        if ncg is None:
-            self.ncg = self.nc
+        self.dtype = dtype
+        self.ncg = nc if ncg is None else ncg
 
         # Get the vertical dimension of the grid.
         if 'N' in self.nc.dimensions.keys():
@@ -285,18 +310,20 @@ class nc_depths(object):
         else:
             raise Exception('grid type ', grid, 'not defined.')
 
-        # Load in the depth and critical depth info
+        # Load in the depth and critical depth info.  The scalar parameters
+        # are converted to Python numbers once here, so they are not carried
+        # through the depth calculations as 0-d (masked) arrays.
         self.h = self.ncg.variables['h'][:]
-        self.hc = self.nc.variables['hc'][:]
+        self.hc = float(self.nc.variables['hc'][...])
 
         # Load in the stretching parameters
-        self.theta_b = self.nc.variables['theta_b'][:]
-        self.theta_s = self.nc.variables['theta_s'][:]
+        self.theta_b = float(self.nc.variables['theta_b'][...])
+        self.theta_s = float(self.nc.variables['theta_s'][...])
 
         if 'Vtransform' in self.nc.variables.keys():
             # Define Vtransform using the values specified in the history file
-            self.Vtransform = self.nc.variables['Vtransform'][:]
-            self.Vstretching = self.nc.variables['Vstretching'][:]
+            self.Vtransform = int(self.nc.variables['Vtransform'][...])
+            self.Vstretching = int(self.nc.variables['Vstretching'][...])
         else:
             # Otherwise, use the defaults based on old-ROMS
             self.Vtransform = 1
@@ -310,7 +337,9 @@ class nc_depths(object):
         self.C = get_Vstretching(self.Vstretching, self.theta_s, self.theta_b, Hscale=3)
 
         # Load in the function for depths(s, zeta)
-        self.depths = get_depths(self.Vtransform, self.C, self.h, self.hc)
+        self.depths = get_depths(self.Vtransform, self.C, self.h, self.hc,
+                                 dtype=self.dtype)
+        self._depths = {}
 
     def get_station_depths(self):
         '''
@@ -327,66 +356,156 @@ class nc_depths(object):
         while len(indices) < 4:
             indices += (slice(None),)
 
-        if isinstance(indices[0], int):
-            zeta = self.zeta[indices[0], ...]
-            depths = self.depths(self.s, zeta)[indices[1], indices[2], indices[3]]
-
+        indices = (_normalize_index(indices[0]),) + indices[1:]
+
+        # When the vertical and horizontal indices are basic indices, only
+        # the requested part of h, zeta and s is used to calculate depths.
+        # Whether the time and vertical axes are kept is found from the
+        # dimensions of what is read, rather than the type of each index.
+        if all(isinstance(idx, _basic_index_types) for idx in indices[1:]):
+            tidx, kidx, jidx, iidx = indices
+            s = self.s[kidx]
+            h = self.h[jidx, iidx]
+            zeta = self.zeta[tidx, jidx, iidx]
+            depths = get_depths(self.Vtransform, self.C, h, self.hc,
+                                dtype=self._result_type(zeta))
+            if np.ndim(zeta) > np.ndim(h):
+                z = depths(np.atleast_1d(s), zeta[:, np.newaxis, ...])
+                kaxis = 1
+            else:
+                z = depths(np.atleast_1d(s), zeta)
+                kaxis = 0
+            if np.ndim(s) == 0:
+                z = z.take(0, axis=kaxis)
+            return z
+
+        zeta = self.zeta[indices[0]]
+        depths = self._get_depths(self._result_type(zeta))
+        if np.ndim(zeta) > np.ndim(self.h):
+            zeta = zeta[:, np.newaxis, ...]
+            indices = (slice(None),) + indices[1:]
         else:
-            zeta = self.zeta[indices[0]][:, np.newaxis, ...]
-            depths = self.depths(self.s, zeta)[:, indices[1], indices[2], indices[3]]
+            indices = indices[1:]
 
-        return depths
+        return depths(self.s, zeta)[indices]
+
+    def _result_type(self, zeta):
+        # Unless dtype is given, depths are calculated with the precision of
+        # h and zeta, so float32 history files give float32 depths.
+        if self.dtype is not None:
+            return np.dtype(self.dtype)
+        return np.result_type(self.h.dtype, np.asanyarray(zeta).dtype,
+                              np.float32)
+
+    def _get_depths(self, dtype):
+        # The depths function for the full grid, calculating in dtype
+        if dtype not in self._depths:
+            self._depths[dtype] = get_depths(self.Vtransform, self.C, self.h,
+                                             self.hc, dtype=dtype)
+        return self._depths[dtype]
 
 
 class nc_velocity (object):
+    """return an object that can be indexed like an ndarray to return velocities
+
+    Parameters
+    ----------
+    nc : netCDF4-like object
+        A reference to the netCDF file to read.
+    grid : 'rho' or 'psi'
+        The grid the velocities are averaged to.  Any value other than 'rho'
+        returns velocities at psi-points.
+    angle : scalar or array_like, optional
+        The grid angle used to rotate the velocities.  By default, the
+        'angle' variable in nc is used, if present.
+
+    Returns
+    -------
+    vel : object
+        Indexing vel returns the tuple (u, v) of velocities on the chosen
+        grid, rotated by the grid angle.  A leading integer, slice or list
+        index selects the time records and is passed directly to the netCDF
+        variables, so a slice such as vel[t0:t1] reads all of the records
+        with a single call and averages and rotates them together.  Any
+        remaining indices are applied to the averaged velocities.  With any
+        other leading index, e.g., vel[..., 2], all records are read.
+
+    """
 
     def __init__(self, nc, grid='rho', angle=None):
+        self.nc = nc
         self.grid = grid
         self.u = self.nc.variables['u']
         self.v = self.nc.variables['v']
         if angle is None:
-            try:
-                self.ang = self.nc.variables['angle'][:,:]
-            except:
-                warn("'angle' not found in netcdf object.")
-                self.ang = None
-        else:
-            self.ang = angle
+            if 'angle' in self.nc.variables:
+                # Keep a reference only; the angle is read when first needed.
+                angle = self.nc.variables['angle']
+            else:
+                warnings.warn("'angle' not found in netcdf object.")
+        self.ang = angle
+        self._cosa = None
+        self._sina = None
+
+    def _set_rotation(self):
+        """Fit the angle to the output grid and store its cosine and sine
+
+        The angle does not change in time, so this is done once, and the
+        rotation is stored as contiguous cosine and sine arrays so that the
+        trig functions are not evaluated again for every record.
+        """
+        ang = self.ang
+        if hasattr(ang, 'shape'):
+            ang = ang[...]
+            if self.grid == 'rho':
+                shp = (self.u.shape[-2], self.v.shape[-1])
+            else:
+                shp = (self.v.shape[-2], self.u.shape[-1])
+            ang = shrink(ang, shp)
+        self._cosa = np.ascontiguousarray(np.cos(ang))
+        self._sina = np.ascontiguousarray(np.sin(ang))
 
     def __getitem__(self, elem):
-        if isinstance(elem, int) or isinstance(elem, float):
-            u = self.u[elem]
-            v = self.v[elem]
-            returnindex = False
+        # Only the time index is passed on to the netCDF variables, so that
+        # just the requested records are read from disk.  The remaining
+        # indices are applied once the velocities are on the output grid.
+        # Any other leading index, e.g., an Ellipsis, may not refer to time,
+        # so all records are read and the whole index applied to them.
+        if not isinstance(elem, tuple):
+            elem = (elem,)
+        if elem and isinstance(elem[0], _basic_index_types + (list, np.ndarray)):
+            tidx, elem = _normalize_index(elem[0]), elem[1:]
+            u = self.u[tidx]
+            v = self.v[tidx]
+            if u.ndim == self.u.ndim:
+                elem = (slice(None),) + elem
         else:
             u = self.u[:]
             v = self.v[:]
-            returnindex = True
 
         if self.grid == 'rho':
-            shp = list(u.shape)
-            shp[-1] -= 1
-            shp[-2] -= 2
-            shpr = list(u.shape)
-            shpr[-1] += 1
-            ur = zeros(shpr)
-            vr = zeros(shpr)
-            ur[...,1:-1,1:-1] = pyroms.shrink(u, shp)
-            vr[...,1:-1,1:-1] = pyroms.shrink(v, shp)
+            shpr = u.shape[:-1] + (u.shape[-1] + 1,)
+            # The interior is overwritten straight away, so only the
+            # boundary rows and columns need to be zeroed.
+            ur = np.empty(shpr)
+            vr = np.empty(shpr)
+            for a in (ur, vr):
+                a[..., 0, :] = 0.0
+                a[..., -1, :] = 0.0
+                a[..., :, 0] = 0.0
+                a[..., :, -1] = 0.0
+            ur[..., 1:-1, 1:-1] = 0.5*(u[..., 1:-1, 1:] + u[..., 1:-1, :-1])
+            vr[..., 1:-1, 1:-1] = 0.5*(v[..., 1:, 1:-1] + v[..., :-1, 1:-1])
             u = ur
             v = vr
         else:
-            u, v = pyroms.shrink(u, v)
-
-        if isinstance(self.ang, ndarray):
-            ang = pyroms.shrink(self.ang, u.shape)
-        else:
-            ang = self.ang
+            u = 0.5*(u[..., 1:, :] + u[..., :-1, :])
+            v = 0.5*(v[..., :, 1:] + v[..., :, :-1])
 
         if self.ang is not None:
-            u, v = pyroms.rot2d(u, v, ang)
+            if self._cosa is None:
+                self._set_rotation()
+            u, v = (u*self._cosa - v*self._sina,
+                    u*self._sina + v*self._cosa)
 
-        if returnindex:
-            return u[elem], v[elem]
-        else:
-            return u, v
+        return u[elem], v[elem]
@@ -23,10 +23,13 @@ numpy
 """
 __docformat__ = "restructuredtext en"
 
+import os
 import numpy as np
 import netCDF4
 from octant.tools import Transect_extrapolator,shrink
-import pylab as pl
+
+# netCDF modes in which an existing bdy file is opened
+_READ_MODES=frozenset(('r','r+','a'))
 
 class Bdyinfo(object):
     """
@@ -39,57 +42,92 @@ class Bdyinfo(object):
     reading/writing Grids and Datasets
     """
 
+    __slots__=('_filename','_i','_j','_indlist')
+
+    # parsed (i, j) indices, keyed by (absolute path, mtime, size) of the file
+    _parsed={}
+    _maxparsed=32
 
     def __init__(self,filename='bdyinfo.dat'):
         """
         read the GETM bdyinfo file
         """
 
-        bdy=open(filename)
         self._filename=filename
-        indlist=[]
+        st=os.stat(filename)
+        key=(os.path.abspath(filename),st.st_mtime,st.st_size)
+        if key not in Bdyinfo._parsed:
+            if len(Bdyinfo._parsed) >= Bdyinfo._maxparsed:
+                Bdyinfo._parsed.clear()
+            Bdyinfo._parsed[key]=Bdyinfo._parse(filename)
+        self._i,self._j=Bdyinfo._parsed[key]
+        self._indlist=None
+
+    @staticmethod
+    def _parse(filename):
+        """
+        return read-only arrays of the i and j indices in the bdyinfo file
+        """
 
-        for d in range(4):
-          line=bdy.readline()
-          for nbdy in range(int(line)):
-              specs=bdy.readline()
-              spec=specs.split()
-              if d == 0: # western boundary
-                  start=int(spec[1])-1
-                  end=int(spec[2])-1
-                  j=range(start,end+1)
-                  i=(int(spec[0])-1)*np.ones((end-start+1),dtype='i')
-                  indlist.extend(zip(i,j))
-              elif d == 1: #northern boundary
-                  start=int(spec[1])-1
-                  end=int(spec[2])-1
-                  i=range(start,end+1)
-                  j=(int(spec[0])-1)*np.ones((end-start+1),dtype='i')
-                  indlist.extend(zip(i,j))
-              elif d == 2: #eastern boundary
-                  start=int(spec[1])-1
-                  end=int(spec[2])-1
-                  j=range(start,end+1)
-                  i=(int(spec[0])-1)*np.ones((end-start+1),dtype='i')
-                  indlist.extend(zip(i,j))
-              elif d == 3: #southern boundary
-                  start=int(spec[1])-1
-                  end=int(spec[2])-1
-                  j=range(start,end+1)
-                  i=(int(spec[0])-1)*np.ones((end-start+1),dtype='i')
-                  indlist.extend(zip(i,j))
+        bdy=open(filename)
 
+        # The segments of the four boundaries (W, N, E, S) are each read as
+        # one block of (constant index, start, end) rows.  Western and
+        # eastern segments have i constant, northern and southern j.
+        specs=[np.empty((0,3),dtype=np.int32)]
+        const_i=[np.empty(0,dtype=bool)]
+        for d in range(4):
+            n=int(bdy.readline())
+            lines=[bdy.readline() for k in range(n)]
+            if n > 0:
+                specs.append(np.loadtxt(lines,dtype=np.int32,usecols=(0,1,2),ndmin=2))
+                const_i.append(np.full(n,d == 0 or d == 2,dtype=bool))
         bdy.close()
-        self._indlist=indlist
+
+        # Expand all of the segments at once: the constant index is
+        # repeated, and the varying index is the segment start plus the
+        # position of each point within its segment.
+        specs=np.concatenate(specs)-1
+        counts=specs[:,2]-specs[:,1]+1
+        first=np.repeat(np.cumsum(counts)-counts,counts)
+        const=np.repeat(specs[:,0],counts)
+        var=np.repeat(specs[:,1],counts)+(np.arange(counts.sum())-first)
+        const_i=np.repeat(np.concatenate(const_i),counts)
+
+        # The i and j indices are kept as separate arrays, so that they
+        # can be used directly to index a grid, e.g., h[bdyinfo.j,bdyinfo.i]
+        # They are shared by all Bdyinfo objects of the file.
+        i=np.where(const_i,const,var).astype(np.int32)
+        j=np.where(const_i,var,const).astype(np.int32)
+        i.flags.writeable=False
+        j.flags.writeable=False
+        return i,j
 
     def get_indlist(self):
+        if self._indlist is None:
+            self._indlist=list(zip(self._i.tolist(),self._j.tolist()))
         return self._indlist
 
+    def get_indices(self):
+        return np.stack((self._i,self._j),axis=1)
+
+    def get_i(self):
+        return self._i
+
+    def get_j(self):
+        return self._j
+
     def get_filename(self):
         return self._filename
 
     indlist=property(get_indlist, None, \
             doc="list of indices in the GETM bdyinfo file")
+    indices=property(get_indices, None, \
+            doc="(N,2) int32 array of the (i,j) indices in the GETM bdyinfo file")
+    i=property(get_i, None, \
+            doc="int32 array of the i indices in the GETM bdyinfo file")
+    j=property(get_j, None, \
+            doc="int32 array of the j indices in the GETM bdyinfo file")
     filename=property(get_filename, None, \
             doc="file name of GETM bdyinfo file")
 
@@ -103,7 +141,13 @@ class Bdy2d(object):
     _eunits='m'
     _ename='elev'
 
-    def __init__(self,filename='bdy_2d.nc',mode='r',timeunits=None,nbdy=None,updatefields=False):
+    __slots__=('_filename','_filemode','_updatefields','_cache','_buffers',
+               '_sync_every','_nput','_zlib','_complevel','_chunksizes',
+               '_ncdf','_tnum','_nbdy','_timeunits','timeunits','elevunits')
+
+    def __init__(self,filename='bdy_2d.nc',mode='r',timeunits=None,nbdy=None,updatefields=False,
+                 sync_every=None,format='NETCDF3_CLASSIC',zlib=False,complevel=4,chunksizes=None,
+                 expected_tnum=None):
         """
         open GETM bdy2d file
 
@@ -112,23 +156,39 @@ class Bdy2d(object):
         timeunits - CF units string of time variable
         nbdy - number of boundary points
         updatefields - boolean; should ncdf fields be updated in the python workspace?
+        sync_every - sync the file to disk after this many calls to putdata or
+                     putdata_batch. By default, the file is only synced on flush
+                     and close.
+        format - netCDF format of a new file. zlib, complevel and chunksizes
+                 only have an effect for the NETCDF4 formats.
+        zlib, complevel - compress elev with deflate at level complevel
+        chunksizes - chunk shape of elev; by default, 1024 timesteps of all
+                     boundary points
+        expected_tnum - number of timesteps of a new file, if known. The time
+                        dimension is then created with this fixed length
+                        instead of as the unlimited record dimension.
         """
 
         self._filename=filename
         self._filemode=mode
         self._updatefields=updatefields
+        self._cache={}
+        self._buffers={}
+        self._sync_every=sync_every
+        self._nput=0
+        self._zlib=zlib
+        self._complevel=complevel
+        self._chunksizes=chunksizes
 
-        self._ncdf=netCDF4.Dataset(self._filename,mode=mode,format='NETCDF3_CLASSIC')
+        self._ncdf=netCDF4.Dataset(self._filename,mode=mode,format=format)
 
-        if mode=='r' or mode == 'r+' or mode=='a':
+        if mode in _READ_MODES:
             self._tnum=len(self._ncdf.dimensions[self._tname])
             self._nbdy=len(self._ncdf.dimensions[self._nbdyname])
-            self.elev=self._ncdf.variables[self._ename][:]
-            self.time=self._ncdf.variables[self._tname][:]
             self.timeunits=self._ncdf.variables[self._tname].units
             self.elevunits=self._ncdf.variables[self._ename].units
         elif mode =='w':
-            self._ncdf.createDimension(self._tname,None)
+            self._ncdf.createDimension(self._tname,expected_tnum)
             self._ncdf.createVariable(self._tname,'f8',(self._tname,))
             if timeunits!=None:
                 self._ncdf.variables[self._tname].units=timeunits
@@ -137,10 +197,8 @@ class Bdy2d(object):
             self._nbdy=nbdy
             if nbdy!= None:
                 self._ncdf.createDimension(self._nbdyname,nbdy)
-                self._ncdf.createVariable(self._ename,'f8',\
-                        (self._tname,self._nbdyname))
-                self._ncdf.variables[self._ename].units=self._eunits
-        self._ncdf.sync()
+                self._create_elev()
+                self._ncdf.sync()
 
     def close(self):
         """
@@ -148,6 +206,12 @@ class Bdy2d(object):
         """
         self._ncdf.close()
 
+    def flush(self):
+        """
+        write buffered data to the GETM bdy2d file
+        """
+        self._ncdf.sync()
+
     def putdata(self,time,data,tind=None):
         """
         put elevation data for one timestep
@@ -155,35 +219,133 @@ class Bdy2d(object):
         data has to be a 1D float list or array.
         """
 
-        data=np.asarray(data)
+        time=float(time)
+        data=np.ascontiguousarray(data,dtype=np.float64)
         nmax=data.shape[0]
+        if self._nbdy != None and nmax != self._nbdy:
+            raise ValueError("length of data %d has to fit nbdy = %d" % (nmax,self._nbdy))
         if self._nbdy == None:
+            # the first write fixes the number of boundary points
             self._nbdy=nmax
-            self._ncdf.createDimension(self._nbdyname,'i')
-            self._ncdf.createVariable(self._ename,'f8',(self._tname,self._nbdyname))
-            self._ncdf.variable[self._ename].units=self._eunits
-
-        if nmax == self._nbdy:
-            if tind == None:
-                tind = self.tnum
-            self._ncdf.variables[self._ename][tind,:]=data
-            self._ncdf.variables[self._tname][tind]=time
-            self._tnum+=1
+            self._ncdf.createDimension(self._nbdyname,nmax)
+            self._create_elev()
+
+        if tind == None:
+            tind = self.tnum
+        self._ncdf.variables[self._ename][tind,:]=data
+        self._ncdf.variables[self._tname][tind]=time
+        self._tnum+=1
+        self._count_put()
+
+        if self._updatefields:
+            # the cached elev and time are updated in place
+            self._update_cached(self._ename,tind,data)
+            self._update_cached(self._tname,tind,time)
+        else:
+            # elev and time are read again when next used
+            self._cache.pop(self._ename,None)
+            self._cache.pop(self._tname,None)
+
+    def putdata_batch(self,times,data,tind=None):
+        """
+        put elevation data for several timesteps into GETM bdy2d
+        file with a single write per variable.
+
+        times - 1D float list or array of length T
+        data - 2D float list or array of shape (T, nbdy)
+        tind - index of the first timestep; by default, the data are appended
+        """
+
+        times=np.ascontiguousarray(times,dtype=np.float64)
+        data=np.ascontiguousarray(data,dtype=np.float64)
+        nt=len(times)
+        if data.ndim != 2 or data.shape[0] != nt or \
+                (self._nbdy != None and data.shape[1] != self._nbdy):
+            raise ValueError("shape of data %s has to be (len(times), nbdy) = %s"
+                             % (data.shape,(nt,self._nbdy)))
+        if self._nbdy == None:
+            # the first write fixes the number of boundary points
+            self._nbdy=data.shape[1]
+            self._ncdf.createDimension(self._nbdyname,self._nbdy)
+            self._create_elev()
+
+        if tind == None:
+            tind = self.tnum
+        self._ncdf.variables[self._ename][tind:tind+nt,:]=data
+        self._ncdf.variables[self._tname][tind:tind+nt]=times
+        self._tnum=max(self._tnum,tind+nt)
+        self._count_put()
+
+        self._cache.pop(self._ename,None)
+        self._cache.pop(self._tname,None)
+
+    def _count_put(self):
+        """
+        count a put, and sync the file every sync_every puts
+        """
+        self._nput+=1
+        if self._sync_every and self._nput % self._sync_every == 0:
             self._ncdf.sync()
 
-            if self._updatefields:
-                self.elev=self._variables[self._ename][:]
-                self.time=self._variables[self._tname][:]
-        else:
-            print("ERROR: length of data has to fit nbdy = ",self_nbdy)
+    def _create_elev(self):
+        """
+        create the elev variable, with the chunking and compression options
+        """
+        tdim=self._ncdf.dimensions[self._tname]
+        tchunk=1024 if tdim.isunlimited() else min(1024,len(tdim))
+        chunksizes=self._chunksizes or (tchunk,self._nbdy)
+        elev=self._ncdf.createVariable(self._ename,'f8',(self._tname,self._nbdyname), \
+                zlib=self._zlib,complevel=self._complevel,chunksizes=chunksizes)
+        elev.units=self._eunits
+
+    def _get_var(self,name):
+        """
+        return the data of variable name, read from the file only once
+        """
+        if name not in self._cache:
+            self._cache[name]=self._ncdf.variables[name][:]
+            self._buffers.pop(name,None)
+        return self._cache[name]
+
+    def _update_cached(self,name,tind,value):
+        """
+        put value at timestep tind of the cached data of variable name,
+        if it has been read, rather than reading the whole variable again.
+        The cached data are a view of a buffer that doubles in length
+        along time when it is full. The buffer is a masked array if the
+        data read from the file are, and the mask is copied with the data.
+        """
+        if name not in self._cache:
+            return
+        data=self._cache[name]
+        if tind > len(data):
+            self._cache.pop(name)
+            return
+        buf=self._buffers.get(name)
+        if buf is None or tind >= len(buf):
+            shape=(max(tind+1,2*len(data)),)+data.shape[1:]
+            if isinstance(data,np.ma.MaskedArray):
+                buf=np.ma.empty(shape,dtype=data.dtype)
+            else:
+                buf=np.empty(shape,dtype=data.dtype)
+            buf[:len(data)]=data
+            self._buffers[name]=buf
+        buf[tind]=value
+        self._cache[name]=buf[:max(len(data),tind+1)]
 
     def get_nbdy(self):
         return self._nbdy
     def get_tnum(self):
         return self._tnum
+    def get_elev(self):
+        return self._get_var(self._ename)
+    def get_time(self):
+        return self._get_var(self._tname)
 
     nbdy=property(get_nbdy,None,doc="Number of boundary steps")
     tnum=property(get_tnum,None,doc="Number of timesteps")
+    elev=property(get_elev,None,doc="Elevation data, read when first used")
+    time=property(get_time,None,doc="Time data, read when first used")
 
 class Bdy3d(object):
     """
@@ -195,7 +357,13 @@ class Bdy3d(object):
     _eunits='m'
     _zname='zax'
 
-    def __init__(self,filename='bdy_3d.nc',mode='r',timeunits=None,nbdy=None,zax=None,updatefields=False):
+    __slots__=('_filename','_filemode','_updatefields','_cache',
+               '_sync_every','_nput','_zlib','_complevel','_chunksizes',
+               '_ncdf','_tnum','_nbdy','_znum','_timeunits','timeunits','zaxunits')
+
+    def __init__(self,filename='bdy_3d.nc',mode='r',timeunits=None,nbdy=None,zax=None,updatefields=False,
+                 sync_every=None,format='NETCDF3_CLASSIC',zlib=False,complevel=4,chunksizes=None,
+                 expected_tnum=None):
         """
         open GETM bdy3d file
 
@@ -205,42 +373,58 @@ class Bdy3d(object):
         nbdy - number of boundary points
         zax - vector of z-levels (positive, increasing depths)
         updatefields - boolean; should ncdf fields be updated in the python workspace?
+        sync_every - sync the file to disk after this many calls to putdata or
+                     putdata_batch. By default, the file is only synced on flush
+                     and close.
+        format - netCDF format of a new file. zlib, complevel and chunksizes
+                 only have an effect for the NETCDF4 formats.
+        zlib, complevel - compress the variables with deflate at level complevel
+        chunksizes - chunk shape of the variables; by default, one timestep
+                     of all boundary points and z-levels
+        expected_tnum - number of timesteps of a new file, if known. The time
+                        dimension is then created with this fixed length
+                        instead of as the unlimited record dimension.
         """
 
         self._filename=filename
         self._filemode=mode
         self._updatefields=updatefields
+        self._cache={}
+        self._sync_every=sync_every
+        self._nput=0
+        self._zlib=zlib
+        self._complevel=complevel
+        self._chunksizes=chunksizes
+
+        # zax is checked before the file is opened, which would create or
+        # truncate it in 'w' mode
+        if mode == 'w' and zax is None:
+            raise ValueError("you have to specify a zax vector!")
 
-        self._ncdf=netCDF4.Dataset(self._filename,mode=mode,format='NETCDF3_CLASSIC')
+        self._ncdf=netCDF4.Dataset(self._filename,mode=mode,format=format)
 
-        if mode=='r' or mode == 'r+' or mode=='a':
+        if mode in _READ_MODES:
             self._tnum=len(self._ncdf.dimensions[self._tname])
             self._nbdy=len(self._ncdf.dimensions[self._nbdyname])
             self._znum=len(self._ncdf.dimensions[self._zname])
-            self.time=self._ncdf.variables[self._tname][:]
-            self.zax=self._ncdf.variables[self._zname][:]
             self.timeunits=self._ncdf.variables[self._tname].units
             self.zaxunits=self._ncdf.variables[self._zname].units
         elif mode =='w':
-            self._ncdf.createDimension(self._tname,None)
+            self._ncdf.createDimension(self._tname,expected_tnum)
             self._ncdf.createVariable(self._tname,'f8',(self._tname,))
             if timeunits!=None:
                 self._ncdf.variables[self._tname].units=timeunits
                 self._timeunits=timeunits
             self._tnum=0
             self._nbdy=nbdy
-            if zax==None:
-                print("you have to specify a zax vector!")
-            else:
-                self._ncdf.createDimension(self._zname,len(zax))
-                zvar=self._ncdf.createVariable(self._zname,'f8',(self._zname,))
-                zvar[:]=zax
-                self.zax=self._ncdf.variables[self._zname][:]
-                self._znum=len(zax)
+            self._ncdf.createDimension(self._zname,len(zax))
+            zvar=self._ncdf.createVariable(self._zname,'f8',(self._zname,))
+            zvar[:]=zax
+            self._znum=len(zax)
             if nbdy!= None:
                 self._ncdf.createDimension(self._nbdyname,nbdy)
                 self._nbdy=nbdy
-        self._ncdf.sync()
+                self._ncdf.sync()
 
     def close(self):
         """
@@ -248,6 +432,12 @@ class Bdy3d(object):
         """
         self._ncdf.close()
 
+    def flush(self):
+        """
+        write buffered data to the GETM bdy3d file
+        """
+        self._ncdf.sync()
+
     def addvar(self,var,units=None,const=None):
         """
         add variable to GETM bdy3d file
@@ -256,12 +446,18 @@ class Bdy3d(object):
         units - CF units string
         const - has to be a float value. If set, then the data-array is filled with const
         """
+        chunksizes=self._chunksizes or (1,self._nbdy,self._znum)
         varvar=self._ncdf.createVariable(var,'f8', \
-                (self._tname,self._nbdyname,self._zname))
-        varvar.units=units
+                (self._tname,self._nbdyname,self._zname), \
+                zlib=self._zlib,complevel=self._complevel,chunksizes=chunksizes)
+        if units!=None:
+            varvar.units=units
         if const!=None:
-            varvar[:]=np.ones((self._tnum,self._nbdy,self._znum), \
-                    dtype='f8')*float(const)
+            # the file is filled one timestep at a time, instead of from
+            # a (tnum,nbdy,znum) array that is allocated twice
+            scratch=np.full((self._nbdy,self._znum),float(const),dtype='f8')
+            for tind in range(self._tnum):
+                varvar[tind,:,:]=scratch
         self._ncdf.sync()
 
 
@@ -274,26 +470,77 @@ class Bdy3d(object):
         data - a 2D float list or array to be put into the bdy3d file.
         """
 
-        data=np.asarray(data)
+        time=float(time)
+        data=np.ascontiguousarray(data,dtype=np.float64)
         nmax,zmax=data.shape
+        if zmax != self._znum or (self._nbdy != None and nmax != self._nbdy):
+            raise ValueError("shape of data %s has to fit (nbdy, znum) = %s"
+                             % (data.shape,(self._nbdy,self._znum)))
         if self._nbdy == None:
+            # the first write fixes the number of boundary points
             self._nbdy=nmax
-            self._ncdf.createDimension(self._nbdyname,'i')
-            self.addvar(varname,'f8',(self._tname,self._nbdyname,self._zname))
-
-        if nmax == self._nbdy and zmax == self._znum:
-            if tind == None:
-                if self.tnum == 0:
-                    tind = 0
-                else:
-                    tind = self.tnum-1
-            self._ncdf.variables[varname][tind,:,:]=data
-            if tind == self.tnum:
-                self._ncdf.variables[self._tname][tind]=time
-                self._tnum=self._tnum+1
+            self._ncdf.createDimension(self._nbdyname,nmax)
+            self.addvar(varname)
+
+        if tind == None:
+            if self.tnum == 0:
+                tind = 0
+            else:
+                tind = self.tnum-1
+        self._ncdf.variables[varname][tind,:,:]=data
+        if tind == self.tnum:
+            self._ncdf.variables[self._tname][tind]=time
+            self._tnum=self._tnum+1
+            self._cache.pop(self._tname,None)
+        self._count_put()
+
+    def putdata_batch(self,times,varname,data,tind=None):
+        """
+        put data for several timesteps into GETM bdy3d file
+        with a single write per variable.
+
+        times - 1D float list or array of length T, in the units of variable time
+        varname - the variable name string of an existing variable
+        data - a 3D float list or array of shape (T, nbdy, znum)
+        tind - index of the first timestep; by default, the data are appended
+        """
+
+        times=np.ascontiguousarray(times,dtype=np.float64)
+        data=np.ascontiguousarray(data,dtype=np.float64)
+        nt=len(times)
+        if data.ndim != 3 or data.shape[0] != nt or data.shape[2] != self._znum or \
+                (self._nbdy != None and data.shape[1] != self._nbdy):
+            raise ValueError("shape of data %s has to be (len(times), nbdy, znum) = %s"
+                             % (data.shape,(nt,self._nbdy,self._znum)))
+        if self._nbdy == None:
+            # the first write fixes the number of boundary points
+            self._nbdy=data.shape[1]
+            self._ncdf.createDimension(self._nbdyname,self._nbdy)
+            self.addvar(varname)
+
+        if tind == None:
+            tind = self.tnum
+        self._ncdf.variables[varname][tind:tind+nt,:,:]=data
+        self._ncdf.variables[self._tname][tind:tind+nt]=times
+        self._tnum=max(self._tnum,tind+nt)
+        self._cache.pop(self._tname,None)
+        self._count_put()
+
+    def _count_put(self):
+        """
+        count a put, and sync the file every sync_every puts
+        """
+        self._nput+=1
+        if self._sync_every and self._nput % self._sync_every == 0:
             self._ncdf.sync()
-        else:
-            print("ERROR: length of data has to fit nbdy = ",self._nbdy," and znum = ",self._znum)
+
+    def _get_var(self,name):
+        """
+        return the data of variable name, read from the file only once
+        """
+        if name not in self._cache:
+            self._cache[name]=self._ncdf.variables[name][:]
+        return self._cache[name]
 
     def get_nbdy(self):
         return self._nbdy
@@ -301,10 +548,26 @@ class Bdy3d(object):
         return self._tnum
     def get_znum(self):
         return self._znum
+    def get_time(self):
+        return self._get_var(self._tname)
+    def get_zax(self):
+        return self._get_var(self._zname)
 
     nbdy=property(get_nbdy,None,doc="Number of boundary steps")
     tnum=property(get_tnum,None,doc="Number of timesteps")
     znum=property(get_znum,None,doc="Number of z-levels")
+    time=property(get_time,None,doc="Time data, read when first used")
+    zax=property(get_zax,None,doc="z-levels, read when first used")
+
+def _corners_to_centers(a, shape):
+    """
+    average 2D cell corner values a to the cell centers of a grid of shape.
+    The usual case of one more corner than centers in each direction is
+    done in a single pass; other shapes are left to shrink.
+    """
+    if a.shape != (shape[0]+1, shape[1]+1):
+        return shrink(a, shape)
+    return 0.25*(a[:-1,:-1] + a[1:,:-1] + a[:-1,1:] + a[1:,1:])
 
 class Transect(Transect_extrapolator):
     """
@@ -321,40 +584,40 @@ class Transect(Transect_extrapolator):
             self.proj = proj
 
         nc = netCDF4.Dataset(ncgrid)
-        gridtype=int(nc.variables['grid_type'][0])
+        variables = nc.variables
+        gridtype=int(variables['grid_type'][0])
+        bathv = variables['bathymetry']
+        h = bathv[:,:]
+        mask = h == bathv.missing_value
         if gridtype == 2:
-            lat = nc.variables['lat'][:]
-            lon = nc.variables['lon'][:]
-            h = nc.variables['bathymetry'][:,:]
-            mask = h == nc.variables['bathymetry'].missing_value
+            lat = variables['lat'][:]
+            lon = variables['lon'][:]
         elif gridtype == 4:
-            lat = nc.variables['latx'][:]
-            lon = nc.variables['lonx'][:]
-            h = nc.variables['bathymetry'][:,:]
-            lat=shrink(lat,h.shape)
-            lon=shrink(lon,h.shape)
-            mask = h == nc.variables['bathymetry'].missing_value
+            lat = _corners_to_centers(variables['latx'][:],h.shape)
+            lon = _corners_to_centers(variables['lonx'][:],h.shape)
         elif gridtype == 1:
-            x = nc.variables['xc']
-            y = nc.variables['yc']
-            h = nc.variables['bathymetry'][:]
-            mask = h == nc.variables['bathymetry'].missing_value
+            x = variables['xc'][:]
+            y = variables['yc'][:]
         elif gridtype == 3:
-            x = nc.variables['xx'][:]
-            y = nc.variables['yx'][:]
-            h = nc.variables['bathymetry'][:,:]
-            x=shrink(x,h.shape)
-            y=shrink(y,h.shape)
-            mask = h == nc.variables['bathymetry'].missing_value
+            x = _corners_to_centers(variables['xx'][:],h.shape)
+            y = _corners_to_centers(variables['yx'][:],h.shape)
         nc.close()
 
-        if gridtype == 2 or gridtype == 4:
-            (lonm,latm)=pylab.meshgrid(lon,lat)
-            x, y = self.proj(lonm[~mask], latm[~mask])
+        # Only the wet points are projected; they are indexed directly
+        # from the 1D or 2D coordinates instead of from full meshgrids.
+        if gridtype == 2:
+            rows, cols = np.nonzero(~mask)
+            x, y = self.proj(lon[cols], lat[rows])
+            lonv, latv = zip(*verts)
+            xv, yv = self.proj(lonv, latv)
+        elif gridtype == 4:
+            x, y = self.proj(lon[~mask], lat[~mask])
             lonv, latv = zip(*verts)
             xv, yv = self.proj(lonv, latv)
-        elif gridtype == 1 or gridtype == 3:
-            (x,y) = pl.meshgrid(x,y)
+        elif gridtype == 1:
+            x, y = np.broadcast_arrays(x[np.newaxis,:], y[:,np.newaxis])
+            xv,yv = zip(*verts)
+        elif gridtype == 3:
             xv,yv = zip(*verts)
 
         verts = zip(xv, yv)
@@ -392,7 +655,7 @@ def writeTopofile(grd, depths=None, ncfile='topo.nc', proj=None, defaultdepth=15
         gridtype=3
 
     angle = grd.angle*180./np.pi
-    inds = pl.where(angle<0.0)
+    inds = np.where(angle<0.0)
     angle[inds]=angle[inds]+180.0
 
     nc = netCDF4.Dataset(ncfile,'w',format='NETCDF3_CLASSIC')
@@ -12,7 +12,7 @@ matplotlib.use('Agg')
 
 from numpy import *
 from matplotlib.pyplot import *
-import pylab
+from matplotlib.dates import date2num, num2date
 import zipfile
 import octant
 import os
@@ -69,11 +69,11 @@ def kmz_anim(lon, lat, time, prop, **kwargs):
         lon = asarray(lon)
         lat = asarray(lat)
         
-        jd = pylab.date2num(time)
+        jd = date2num(time)
         jd_edges = hstack((1.5*jd[0]-0.5*jd[1], 
                            0.5*(jd[1:]+jd[:-1]), 
                            1.5*jd[-1]-0.5*jd[-2]))
-        time_edges = pylab.num2date(jd_edges)
+        time_edges = num2date(jd_edges)
         time_starts = time_edges[:-1]
         time_stops = time_edges[1:]
         
@@ -0,0 +1,32 @@
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+
+import octant
+
+
+def test_get_Hz_time_zeta():
+    '''get_Hz with a time axis on zeta returns (T, N, ...) thicknesses'''
+    N = 10
+    h = np.linspace(10.0, 100.0, 12).reshape(3, 4)
+    zeta = np.linspace(-0.5, 0.5, 5)[:, np.newaxis, np.newaxis] * np.ones((3, 4))
+    for Vtransform in (1, 2):
+        for Vstretching in (1, 2, 3, 4):
+            Hz = octant.get_Hz(Vtransform, Vstretching, N, 5.0, 0.4, h, 5.0, zeta)
+            assert Hz.shape == (5, N, 3, 4)
+            for n in range(len(zeta)):
+                Hz_n = octant.get_Hz(Vtransform, Vstretching, N, 5.0, 0.4, h, 5.0,
+                                     zeta[n])
+                zw_n = octant.get_zw(Vtransform, Vstretching, N+1, 5.0, 0.4, h, 5.0,
+                                     zeta[n])
+                assert np.allclose(Hz[n], Hz_n)
+                assert np.allclose(Hz[n], np.diff(zw_n, axis=0))
+            assert np.allclose(Hz.sum(axis=1), h + zeta)
+
+
+def test_get_Hz_time_zeta_scalar_h():
+    '''get_Hz with a scalar h and a time series of zeta returns (T, N)'''
+    zeta = np.array([-0.2, 0.0, 0.3])
+    Hz = octant.get_Hz(2, 4, 8, 5.0, 0.4, 50.0, 5.0, zeta)
+    assert Hz.shape == (3, 8)
+    assert np.allclose(Hz.sum(axis=1), 50.0 + zeta)
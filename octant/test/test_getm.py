@@ -0,0 +1,97 @@
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pytest
+
+from octant.sandbox import getm
+
+
+def _write(tmpdir, name, text):
+    filename = str(tmpdir.join(name))
+    with open(filename, 'w') as f:
+        f.write(text)
+    return filename
+
+
+def test_bdyinfo_indices(tmpdir):
+    '''western/eastern segments have constant i, northern/southern constant j'''
+    filename = _write(tmpdir, 'bdyinfo.dat',
+                      '2\n1 2 5 2\n1 8 9 2\n'     # west
+                      '1\n20 3 6 1\n'             # north
+                      '1\n9 2 3 1\n'              # east
+                      '1\n1 4 7 3\n')             # south
+    bdy = getm.Bdyinfo(filename)
+    indlist = ([(0, 1), (0, 2), (0, 3), (0, 4), (0, 7), (0, 8)] +
+               [(2, 19), (3, 19), (4, 19), (5, 19)] +
+               [(8, 1), (8, 2)] +
+               [(3, 0), (4, 0), (5, 0), (6, 0)])
+    assert bdy.indlist == indlist
+    assert np.array_equal(bdy.i, [i for i, j in indlist])
+    assert np.array_equal(bdy.j, [j for i, j in indlist])
+    assert bdy.i.dtype == np.int32 and bdy.j.dtype == np.int32
+    assert np.array_equal(bdy.indices, indlist)
+
+
+def test_bdyinfo_empty_boundary(tmpdir):
+    '''a boundary without segments adds no indices'''
+    filename = _write(tmpdir, 'bdyinfo_empty.dat',
+                      '1\n1 2 3 2\n'              # west
+                      '0\n'                       # north
+                      '0\n'                       # east
+                      '1\n1 4 5 3\n')             # south
+    bdy = getm.Bdyinfo(filename)
+    indlist = [(0, 1), (0, 2), (3, 0), (4, 0)]
+    assert bdy.indlist == indlist
+    assert np.array_equal(bdy.i, [0, 0, 3, 4])
+    assert np.array_equal(bdy.j, [1, 2, 0, 0])
+
+
+def test_bdy2d_updatefields(tmpdir):
+    '''with updatefields, the cached elev and time follow the file'''
+    bdy = getm.Bdy2d(str(tmpdir.join('bdy_2d.nc')), 'w', timeunits='s', nbdy=3,
+                     updatefields=True)
+    bdy.putdata(0.0, [1.0, 2.0, 3.0])
+    bdy._ncdf.variables['elev'][0, 1] = np.ma.masked
+    bdy.putdata(1.0, [4.0, 5.0, 6.0])
+    for n in range(2, 6):
+        bdy.elev
+        bdy.putdata(float(n), np.arange(3.0) + n)
+        elev = bdy._ncdf.variables['elev'][:]
+        assert isinstance(bdy.elev, np.ma.MaskedArray)
+        assert np.array_equal(np.ma.getmaskarray(bdy.elev), np.ma.getmaskarray(elev))
+        assert np.ma.allequal(bdy.elev, elev)
+        assert np.array_equal(bdy.time, np.arange(n + 1.0))
+    bdy.close()
+
+
+def test_bdy3d_requires_zax(tmpdir):
+    '''a new Bdy3d without zax raises, and leaves an existing file alone'''
+    filename = _write(tmpdir, 'bdy_3d.nc', 'existing')
+    with pytest.raises(ValueError):
+        getm.Bdy3d(filename, 'w', timeunits='s', nbdy=3)
+    with open(filename) as f:
+        assert f.read() == 'existing'
+    with pytest.raises(ValueError):
+        getm.Bdy3d(str(tmpdir.join('new_3d.nc')), 'w', timeunits='s', nbdy=3)
+    assert not tmpdir.join('new_3d.nc').check()
+
+
+def test_putdata_batch_first_write(tmpdir):
+    '''the first putdata_batch of a file created without nbdy sets nbdy'''
+    bdy = getm.Bdy2d(str(tmpdir.join('bdy_2d.nc')), 'w', timeunits='s')
+    bdy.putdata_batch([0.0, 1.0], np.ones((2, 3)))
+    bdy.putdata(2.0, [2.0, 2.0, 2.0])
+    with pytest.raises(ValueError):
+        bdy.putdata_batch([3.0], np.ones((1, 4)))
+    assert bdy.nbdy == 3 and bdy.tnum == 3
+    assert np.array_equal(bdy.elev, [[1, 1, 1], [1, 1, 1], [2, 2, 2]])
+    bdy.close()
+
+    bdy = getm.Bdy3d(str(tmpdir.join('bdy_3d.nc')), 'w', timeunits='s',
+                     zax=[1.0, 2.0])
+    bdy.putdata_batch([0.0, 1.0], 'temp', np.ones((2, 3, 2)))
+    with pytest.raises(ValueError):
+        bdy.putdata_batch([2.0], 'temp', np.ones((1, 3, 3)))
+    assert bdy.nbdy == 3 and bdy.tnum == 2
+    assert bdy._ncdf.variables['temp'].shape == (2, 3, 2)
+    bdy.close()
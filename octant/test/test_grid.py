@@ -11,7 +11,7 @@ ro = 10
 Ny = 10
 Nx = 54
 
-theta = np.linspace(0, 540, Nx+1) * pi / 180.0
+theta = np.linspace(0, 540, Nx+1) * np.pi / 180.0
 r = np.linspace(ro, ro+10, Ny+1)
 
 r, theta = np.meshgrid(r, theta)
@@ -22,4 +22,48 @@ y = r * np.cos(theta)
 
 grd = octant.CGrid(x, y)
 
-plt.pcolormesh(grd.x, grd.y, grd.angle)
+pyplot.pcolormesh(grd.x, grd.y, grd.angle)
+
+
+def test_points_inside_poly():
+    '''points_inside_poly agrees with matplotlib Path.contains_points'''
+    from matplotlib.path import Path
+
+    theta = np.linspace(0, 2*np.pi, 40, endpoint=False)
+    r = 1 + 0.5*np.sin(5*theta)
+    verts = np.c_[r*np.cos(theta), r*np.sin(theta)]
+    points = np.random.RandomState(0).uniform(-1.6, 1.6, (2000, 2))
+    inside = Path(verts).contains_points(points)
+    assert inside.any() and not inside.all()
+
+    assert np.array_equal(octant.tools.points_inside_poly(points, verts), inside)
+    # the first vertex repeated at the end gives the same polygon
+    closed = np.vstack((verts, verts[:1]))
+    assert np.array_equal(octant.tools.points_inside_poly(points, closed), inside)
+    for chunksize in (1, 7):
+        assert np.array_equal(
+            octant.tools.points_inside_poly(points, verts, chunksize=chunksize),
+            inside)
+
+
+def test_points_inside_poly_edges():
+    '''points on the left and bottom edges of a polygon are inside'''
+    square = [[0, 0], [2, 0], [2, 2], [0, 2]]
+    points = [[1, 1], [3, 1], [0, 1], [1, 0], [2, 1], [1, 2]]
+    expected = [True, False, True, True, False, False]
+    for verts in (square, square + square[:1]):
+        for chunksize in (None, 1):
+            assert np.array_equal(
+                octant.tools.points_inside_poly(points, verts, chunksize=chunksize),
+                expected)
+
+
+def test_mask_polygon():
+    '''mask_polygon masks the cells with centers inside the polygon'''
+    x, y = np.meshgrid(np.arange(6.0), np.arange(5.0))
+    grd = octant.CGrid(x, y)
+    grd.mask_polygon([(0.1, 0.1), (2.6, 0.1), (2.6, 2.4), (0.1, 2.4)])
+    expected = np.ones((4, 5))
+    expected[:2, :3] = 0.0
+    assert np.array_equal(grd.mask_rho, expected)
+    assert np.array_equal(grd.mask_u, expected[:, 1:]*expected[:, :-1])
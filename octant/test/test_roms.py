@@ -0,0 +1,108 @@
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import netCDF4
+
+import octant
+
+
+def _history(T=3, N=4, J=5, I=6, dtype='f8'):
+    '''return a small diskless ROMS history file'''
+    nc = netCDF4.Dataset('test_roms_%s.nc' % dtype, 'w', diskless=True)
+    nc.createDimension('ocean_time', T)
+    nc.createDimension('s_rho', N)
+    nc.createDimension('eta_rho', J)
+    nc.createDimension('xi_rho', I)
+    for name, value in (('hc', 5.0), ('theta_s', 5.0), ('theta_b', 0.4)):
+        nc.createVariable(name, 'f8', ())[...] = value
+    for name in ('Vtransform', 'Vstretching'):
+        nc.createVariable(name, 'i4', ())
+    nc.variables['Vtransform'][...] = 2
+    nc.variables['Vstretching'][...] = 4
+    x, y = np.meshgrid(np.arange(I), np.arange(J))
+    nc.createVariable('h', dtype, ('eta_rho', 'xi_rho'))[:] = 10.0 + 5.0*x + y
+    zeta = nc.createVariable('zeta', dtype, ('ocean_time', 'eta_rho', 'xi_rho'))
+    zeta[:] = 0.1*np.arange(T)[:, np.newaxis, np.newaxis] + 0.01*(x - y)
+    return nc
+
+
+def test_nc_depths_indexing():
+    '''indexing nc_depths matches indexing the full depths'''
+    nc = _history()
+    indices = [1, -1, np.int64(2), slice(None), slice(1, 3), slice(None, None, -1),
+               slice(3, 0, -2), [0, 2]]
+    for grid in ('rho', 'w'):
+        z = octant.roms.nc_depths(nc, grid=grid)
+        full = z.depths(z.s, nc.variables['zeta'][:][:, np.newaxis])
+        assert full.shape == (3, z.N, 5, 6)
+        for axis in range(4):
+            for idx in indices:
+                ix = (slice(None),)*axis + (idx,)
+                assert np.allclose(z[ix], full[ix]), (grid, ix)
+        for ix in [(1, 2, 3, 4), (-1, slice(None, None, -1), 0, -2),
+                   (slice(0, 2), 0, slice(4, 0, -1), np.int64(5)),
+                   ([0, 2], slice(1, 3), 0, 4)]:
+            assert np.allclose(z[ix], full[ix]), (grid, ix)
+    nc.close()
+
+
+def test_nc_depths_float32():
+    '''depths from a float32 file are calculated and returned as float32'''
+    nc = _history(dtype='f4')
+    nc64 = _history()
+    for grid in ('rho', 'w'):
+        z = octant.roms.nc_depths(nc, grid=grid)
+        z64 = octant.roms.nc_depths(nc64, grid=grid)
+        for ix in [(slice(None),), (1, slice(None), 2), (0, [1, 2]), (slice(None), 0)]:
+            assert z[ix].dtype == np.float32, (grid, ix)
+            assert np.allclose(z[ix], z64[ix], rtol=1e-5, atol=1e-4), (grid, ix)
+        z = octant.roms.nc_depths(nc, grid=grid, dtype=np.float64)
+        assert z[0].dtype == np.float64 and z[0, [1, 2]].dtype == np.float64
+    nc.close()
+    nc64.close()
+
+
+def _velocities(T=4, N=3, J=5, I=6):
+    '''return a small diskless ROMS file with u, v and angle'''
+    nc = netCDF4.Dataset('test_roms_velocity.nc', 'w', diskless=True)
+    for name, n in (('ocean_time', T), ('s_rho', N), ('eta_rho', J),
+                    ('xi_rho', I), ('eta_v', J-1), ('xi_u', I-1)):
+        nc.createDimension(name, n)
+    rs = np.random.RandomState(0)
+    nc.createVariable('u', 'f8', ('ocean_time', 's_rho', 'eta_rho', 'xi_u'))[:] = \
+        rs.rand(T, N, J, I-1)
+    nc.createVariable('v', 'f8', ('ocean_time', 's_rho', 'eta_v', 'xi_rho'))[:] = \
+        rs.rand(T, N, J-1, I)
+    nc.createVariable('angle', 'f8', ('eta_rho', 'xi_rho'))[:] = rs.rand(J, I)
+    return nc
+
+
+def test_nc_velocity_indexing():
+    '''indexing nc_velocity matches indexing the full rotated velocities'''
+    nc = _velocities()
+    u = nc.variables['u'][:]
+    v = nc.variables['v'][:]
+    angle = nc.variables['angle'][:]
+    for grid in ('rho', 'psi'):
+        if grid == 'rho':
+            # interior points are averaged, boundary points are zero
+            shape = u.shape[:-1] + (u.shape[-1] + 1,)
+            ur = np.zeros(shape)
+            vr = np.zeros(shape)
+            ur[..., 1:-1, 1:-1] = 0.5*(u[..., 1:-1, 1:] + u[..., 1:-1, :-1])
+            vr[..., 1:-1, 1:-1] = 0.5*(v[..., 1:, 1:-1] + v[..., :-1, 1:-1])
+        else:
+            ur, vr = octant.tools.shrink(u, v)
+        ur, vr = octant.tools.rot2d(ur, vr, octant.tools.shrink(angle, ur.shape))
+
+        vel = octant.roms.nc_velocity(nc, grid=grid)
+        for ix in [1, np.int64(2), -1, slice(1, 3), slice(None, None, -2), [0, 2],
+                   np.array([1, 2, 3]), (2, 0), (slice(0, 4, 2), slice(None), 3),
+                   (1, 1, slice(1, 4), 2), ([0, 1, 3], 0), (Ellipsis, 2),
+                   Ellipsis, (Ellipsis, 1, slice(0, 2)), (1, Ellipsis, 0),
+                   (None, 1)]:
+            uix, vix = vel[ix]
+            assert uix.shape == ur[ix].shape, (grid, ix)
+            assert np.allclose(uix, ur[ix]), (grid, ix)
+            assert np.allclose(vix, vr[ix]), (grid, ix)
+    nc.close()
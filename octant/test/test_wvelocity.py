@@ -0,0 +1,90 @@
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+
+import octant
+
+
+def _masked_fields(K=4, J=6, I=7):
+    '''return velocities, metrics and Hz with a land column in u'''
+    rs = np.random.RandomState(0)
+    u = np.ma.masked_array(rs.rand(K, J, I-1))
+    u[:, 2, 3] = np.ma.masked
+    u.data[:, 2, 3] = 1e37
+    v = np.ma.masked_array(rs.rand(K, J-1, I))
+    pm = 1.0 + rs.rand(J, I)
+    pn = 1.0 + rs.rand(J, I)
+    Hz = 1.0 + rs.rand(K, J, I)
+    return u, v, pm, pn, Hz
+
+
+def test_omegaHz_velocity_masked():
+    '''masked velocities are masked in omegaHz, and do not enter the sum'''
+    u, v, pm, pn, Hz = _masked_fields()
+    uflux = u[..., 1:-1, :] * 0.5 * (Hz[..., 1:-1, :-1] + Hz[..., 1:-1, 1:])
+    vflux = v[..., :, 1:-1] * 0.5 * (Hz[..., :-1, 1:-1] + Hz[..., 1:, 1:-1])
+    expected = np.ma.cumsum(- np.diff(uflux, axis=-1)*pm[1:-1, 1:-1]
+                            - np.diff(vflux, axis=-2)*pn[1:-1, 1:-1], axis=-3)
+
+    omegaHz = octant.omegaHz_velocity(u, v, pm, pn, Hz)
+    assert isinstance(omegaHz, np.ma.MaskedArray)
+    assert omegaHz.shape == (4, 4, 5)
+    assert np.array_equal(np.ma.getmaskarray(omegaHz), np.ma.getmaskarray(expected))
+    assert np.ma.getmaskarray(omegaHz).sum() == 8
+    assert np.ma.allclose(omegaHz, expected)
+    assert np.abs(omegaHz).max() < 100.0
+
+
+def test_w_velocity_masked():
+    '''masked inputs are masked in w'''
+    u, v, pm, pn, Hz = _masked_fields()
+    omegaHz = octant.omegaHz_velocity(u, v, pm, pn, Hz)
+    zr = np.ma.masked_array(-np.cumsum(Hz, axis=0))
+    zr[1, 0, 2] = np.ma.masked
+    pm_u = 0.5 * (pm[:, :-1] + pm[:, 1:])
+    pn_v = 0.5 * (pn[:-1, :] + pn[1:, :])
+    expected = (np.diff(u * pm_u * np.diff(zr, axis=-1), axis=-1)[..., 1:-1, :] +
+                np.diff(v * pn_v * np.diff(zr, axis=-2), axis=-2)[..., :, 1:-1] +
+                omegaHz)
+
+    w = octant.w_velocity(u, v, omegaHz, pm, pn, zr)
+    assert isinstance(w, np.ma.MaskedArray)
+    assert np.array_equal(np.ma.getmaskarray(w), np.ma.getmaskarray(expected))
+    assert np.ma.getmaskarray(w).any()
+    assert np.ma.allclose(w, expected)
+    assert np.abs(w).max() < 100.0
+
+
+def _analytic(dtype=None):
+    '''return w and the analytic w for a sinusoidal u over a flat bottom'''
+    k = 1 / 3000.0
+    H = 100.0
+    Umax = 0.5
+    Hz = octant.get_Hz(2, 4, 30, 5.0, 1.0, H*np.ones((40, 50)), 10.0)
+    zr = octant.get_zrho(2, 4, 30, 5.0, 1.0, H*np.ones((40, 50)), 10.0)
+
+    x, y = np.meshgrid(500.0 * np.arange(50), 500.0 * np.arange(40))
+    xu = 0.5 * (x[:, 1:] + x[:, :-1])
+    u = Umax * np.ones((30, 40, 49)) * np.sin(k * xu)
+    v = np.zeros((30, 39, 50))
+    pm = 0.002 * np.ones((40, 50))
+    pn = 0.002 * np.ones((40, 50))
+
+    omegaHz = octant.omegaHz_velocity(u, v, pm, pn, Hz, dtype=dtype)
+    w = octant.w_velocity(u, v, omegaHz, pm, pn, zr, dtype=dtype)
+    w_ana = - (k * Umax * H) * np.cos(k * x[1, 1:-1])
+    return w, w_ana
+
+
+def test_w_velocity_analytic():
+    '''w at the top level matches the analytic solution'''
+    w, w_ana = _analytic()
+    assert w.shape == (30, 38, 48)
+    assert np.allclose(w[-1, 1, :], w_ana, rtol=0.01)
+
+
+def test_w_velocity_dtype():
+    '''with dtype, the calculation is done in that type'''
+    w, w_ana = _analytic(dtype=np.float32)
+    assert w.dtype == np.float32
+    assert np.allclose(w[-1, 1, :], w_ana, rtol=0.01)
@@ -1,6 +1,5 @@
 from __future__ import absolute_import, division, print_function
 
-import warnings
 import numpy as np
 
 # from matplotlib import delaunay
@@ -20,8 +19,10 @@ import numpy as np
 
 def rot2d(x, y, ang):
     '''rotate vectors by geometric angle'''
-    xr = x*np.cos(ang) - y*np.sin(ang)
-    yr = x*np.sin(ang) + y*np.cos(ang)
+    cosa = np.cos(ang)
+    sina = np.sin(ang)
+    xr = x*cosa - y*sina
+    yr = x*sina + y*cosa
     return xr, yr
 
 
@@ -284,7 +285,6 @@ def N2(rho, z, rho_0=1000.0):
     return -(9.8 / rho_0) * r_z
 
 
-# change to new algorithm.
 def arg_nearest(x, xo, scale=None):
     """returns indices of closest point in an N arrays.
 
@@ -301,8 +301,8 @@ def arg_nearest(x, xo, scale=None):
 
     Returns
     -------
-    indexes : ndarray
-        An array of indicies such that (x[idx], y[idx], z[idx], ...) is the
+    indexes : tuple of ints
+        The indicies such that (x[idx], y[idx], z[idx], ...) is the
         closest point to xo
 
     """
@@ -320,8 +320,76 @@ def arg_nearest(x, xo, scale=None):
         x = [p*q for (p, q) in zip(x, scale)]
         xo = [p*q for (p, q) in zip(xo, scale)]
 
-    q = reduce(np.add, [(y-yo)**2 for (y, yo) in zip(x, xo)])
-    return np.where(q == q.min())
+    # The distances are summed in place, so the buffer is made wide enough
+    # for every coordinate, e.g., float for integer grids and a float point.
+    dtype = np.result_type(1.0, *(list(x) + list(xo)))
+    q = np.asarray((x[0] - xo[0])**2, dtype=dtype)
+    for y, yo in zip(x[1:], xo[1:]):
+        q += (y - yo)**2
+    return np.unravel_index(np.argmin(q), q.shape)
+
+def points_inside_poly(points, verts, chunksize=None):
+    """returns a boolean array, True for the points inside a polygon.
+
+    Parameters
+    ----------
+    points : array_like
+        (P, 2) array of the x, y coordinates of the query points.
+    verts : array_like
+        (V, 2) array of the x, y coordinates of the polygon verticies. The
+        polygon is closed automatically, so the first vertex does not need to
+        be repeated at the end.
+    chunksize : int, optional
+        The number of points tested at a time.  By default, this is chosen so
+        that the (chunksize, V) temporary arrays have about 2**18 elements,
+        which keeps them in cache and bounds the memory used for large P.
+
+    Returns
+    -------
+    inside : ndarray
+        (P,) boolean array, True where a point is inside the polygon.
+
+    Notes
+    -----
+    This uses the crossing number test of W. R. Franklin's pnpoly. The test
+    is made for all points against all polygon edges at once by broadcasting
+    the (P, 1) points against the (V,) edges, in blocks of chunksize points,
+    and the crossings for each point are combined with an exclusive or.
+
+    """
+
+    points = np.asarray(points, dtype='d')
+    verts = np.asarray(verts, dtype='d')
+
+    # Edge k joins vertex i = k to vertex j = k-1.
+    xpi, ypi = verts[:, 0], verts[:, 1]
+    xpj = np.empty_like(xpi)
+    xpj[0] = xpi[-1]
+    xpj[1:] = xpi[:-1]
+    ypj = np.empty_like(ypi)
+    ypj[0] = ypi[-1]
+    ypj[1:] = ypi[:-1]
+
+    # The inverse slope of each edge is found once, so the test for each
+    # point needs no division.  Horizontal edges are never crossed, so
+    # their slope is set to zero; it does not change the result.
+    dy = ypj - ypi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(dy != 0.0, (xpj - xpi) / dy, 0.0)
+
+    if chunksize is None:
+        chunksize = max(1, 2**18 // len(verts))
+
+    inside = np.empty(len(points), dtype=bool)
+    for n in range(0, len(points), chunksize):
+        x = points[n:n+chunksize, 0, np.newaxis]
+        y = points[n:n+chunksize, 1, np.newaxis]
+        crosses = ((ypi <= y) != (ypj <= y)) & \
+                  (x < slope * (y - ypi) + xpi)
+        np.logical_xor.reduce(crosses, axis=1, out=inside[n:n+chunksize])
+
+    return inside
+
 
 # I'm not even sure this makes sense anymore. Sandbox.
 def extrapolate_mask(a, mask=None):
@@ -5,7 +5,20 @@ from __future__ import absolute_import, division, print_function
 
 import numpy as np
 
-def omegaHz_velocity(u, v, pm, pn, Hz, Hz_t=0):
+def _fill_masked(*arrays):
+    '''
+    Return the arrays with masked values set to zero, and their masks.
+
+    The masks are None if none of the arrays is a MaskedArray.
+    '''
+    if not any(isinstance(a, np.ma.MaskedArray) for a in arrays):
+        return arrays, None
+    masks = [np.ma.getmaskarray(a) for a in arrays]
+    arrays = [np.ma.filled(a, 0) if isinstance(a, np.ma.MaskedArray) else a
+              for a in arrays]
+    return arrays, masks
+
+def omegaHz_velocity(u, v, pm, pn, Hz, Hz_t=0, dtype=None):
     '''
     Calculate omega*Hz, the grid-relative vertical velocity, on the s-coordinate.
     
@@ -24,6 +37,8 @@ def omegaHz_velocity(u, v, pm, pn, Hz, Hz_t=0):
         The vertical layer thickness at rho-points
     Hz_t : 3D or 4D array
         The rate of change of the the vertical coordinate.  [Default = 0]
+    dtype : data-type, optional
+        The type of the result.  [Default = None]
     
     Returns
     -------
@@ -33,13 +48,49 @@ def omegaHz_velocity(u, v, pm, pn, Hz, Hz_t=0):
     
     '''
     
-    uflux = u[..., 1:-1, :] * 0.5 * (Hz[..., 1:-1, :-1] + Hz[..., 1:-1, 1:])
-    vflux = v[..., :, 1:-1]  * 0.5 * (Hz[..., :-1, 1:-1] + Hz[..., 1:, 1:-1])
-    omegaHz_sigma = -Hz_t - np.diff(uflux, axis=-1)*pm[1:-1, 1:-1] - np.diff(vflux, axis=-2)*pn[1:-1, 1:-1] 
-    
-    return np.cumsum(omegaHz_sigma, axis=-3)
+    if dtype is not None:
+        u, v, pm, pn, Hz, Hz_t = [np.asanyarray(a).astype(dtype, copy=False)
+                                  for a in (u, v, pm, pn, Hz, Hz_t)]
+
+    # The calculation is done on plain arrays.  Masked input values do not
+    # contribute to the vertical sum, and the result is masked wherever any
+    # of its inputs is masked.
+    (u, v, pm, pn, Hz, Hz_t), masks = _fill_masked(u, v, pm, pn, Hz, Hz_t)
+
+    # Fluxes are calculated with the factor of 0.5 from the Hz average left
+    # out, and it is folded into the metrics below.  All following operations
+    # are done in place to avoid allocating full size temporary arrays, so
+    # the result is allocated with the type and shape of all of the inputs,
+    # e.g., a Hz_t with a time axis that u does not have.
+    uflux = u[..., 1:-1, :] * (Hz[..., 1:-1, :-1] + Hz[..., 1:-1, 1:])
+    vflux = v[..., :, 1:-1] * (Hz[..., :-1, 1:-1] + Hz[..., 1:, 1:-1])
+
+    shape = np.broadcast(uflux[..., 1:], vflux[..., 1:, :], Hz_t).shape
+    omegaHz_sigma = np.empty(shape, dtype=np.result_type(u, v, pm, pn, Hz, Hz_t))
+    np.subtract(uflux[..., 1:], uflux[..., :-1], out=omegaHz_sigma)
+    omegaHz_sigma *= 0.5 * pm[1:-1, 1:-1]
+    divy = np.subtract(vflux[..., 1:, :], vflux[..., :-1, :],
+                       dtype=omegaHz_sigma.dtype)
+    divy *= 0.5 * pn[1:-1, 1:-1]
+    omegaHz_sigma += divy
+    omegaHz_sigma += Hz_t
+    np.negative(omegaHz_sigma, out=omegaHz_sigma)
+
+    if masks is None:
+        return np.cumsum(omegaHz_sigma, axis=-3, out=omegaHz_sigma)
 
-def w_velocity(u, v, omegaHz, pm, pn, zr, z_t =0):
+    mu, mv, mpm, mpn, mHz, mHz_t = masks
+    muflux = mu[..., 1:-1, :] | mHz[..., 1:-1, :-1] | mHz[..., 1:-1, 1:]
+    mvflux = mv[..., :, 1:-1] | mHz[..., :-1, 1:-1] | mHz[..., 1:, 1:-1]
+    mask = np.broadcast_to(muflux[..., 1:] | muflux[..., :-1] | mpm[1:-1, 1:-1] |
+                           mvflux[..., 1:, :] | mvflux[..., :-1, :] |
+                           mpn[1:-1, 1:-1] | mHz_t, shape).copy()
+    np.copyto(omegaHz_sigma, 0, where=mask)
+    np.cumsum(omegaHz_sigma, axis=-3, out=omegaHz_sigma)
+    return np.ma.masked_array(omegaHz_sigma, mask=mask)
+
+def w_velocity(u, v, omegaHz, pm, pn, zr, z_t =0, pm_u=None, pn_v=None,
+               dtype=None):
     '''
     Calculate the actual vertical velocity, w.
     
@@ -61,6 +112,12 @@ def w_velocity(u, v, omegaHz, pm, pn, zr, z_t =0):
         The vertical layer thickness at rho-points
     z_t : 3D or 4D array
         The rate of change of the the vertical coordinate.  [Default = 0]
+    pm_u, pn_v : 2D arrays, optional
+        pm averaged to u-points and pn averaged to v-points.  These are
+        calculated from pm and pn if not given; pass CGrid.pm_u and
+        CGrid.pn_v to avoid recalculating them at every time step.
+    dtype : data-type, optional
+        The type of the result.  [Default = None]
     
     Returns
     -------
@@ -69,13 +126,52 @@ def w_velocity(u, v, omegaHz, pm, pn, zr, z_t =0):
     
     '''
     
-    pm_u = 0.5 * (pm[:, :-1] + pm[:, 1:])
-    pn_v = 0.5 * (pn[:-1, :] + pn[1:, :])
-    
-    divz_x = np.diff(u * pm_u * np.diff(zr, axis=-1), axis=-1)[..., 1:-1, :]
-    divz_y = np.diff(v * pn_v * np.diff(zr, axis=-2), axis=-2)[..., :, 1:-1]
-    
-    return z_t + divz_x + divz_y + omegaHz
+    if dtype is not None:
+        u, v, omegaHz, pm, pn, zr, z_t = [
+            np.asanyarray(a).astype(dtype, copy=False)
+            for a in (u, v, omegaHz, pm, pn, zr, z_t)]
+        if pm_u is not None:
+            pm_u = np.asanyarray(pm_u).astype(dtype, copy=False)
+        if pn_v is not None:
+            pn_v = np.asanyarray(pn_v).astype(dtype, copy=False)
+
+    if pm_u is None:
+        pm_u = 0.5 * (pm[:, :-1] + pm[:, 1:])
+    if pn_v is None:
+        pn_v = 0.5 * (pn[:-1, :] + pn[1:, :])
+
+    # As in omegaHz_velocity, w is masked wherever any input is masked.
+    (u, v, omegaHz, pm_u, pn_v, zr, z_t), masks = _fill_masked(
+        u, v, omegaHz, pm_u, pn_v, zr, z_t)
+    
+    # Only the interior rows (columns) of the x (y) fluxes are needed, so
+    # the slopes are calculated there only, and the divergence is accumulated
+    # in place.  The slopes may have a time axis that u and v do not have.
+    zflux_x = u[..., 1:-1, :] * pm_u[1:-1, :] * np.diff(zr[..., 1:-1, :], axis=-1)
+    zflux_y = v[..., :, 1:-1] * pn_v[:, 1:-1] * np.diff(zr[..., :, 1:-1], axis=-2)
+
+    # w is allocated to fit all of the inputs, so that, e.g., a 4D omegaHz
+    # is broadcast against 3D velocities.
+    shape = np.broadcast(zflux_x[..., 1:], zflux_y[..., 1:, :],
+                         omegaHz, z_t).shape
+    w = np.empty(shape, dtype=np.result_type(zflux_x, zflux_y, omegaHz, z_t))
+    np.subtract(zflux_x[..., 1:], zflux_x[..., :-1], out=w)
+    w += zflux_y[..., 1:, :]
+    w -= zflux_y[..., :-1, :]
+    w += omegaHz
+    w += z_t
+
+    if masks is None:
+        return w
+
+    mu, mv, momegaHz, mpm_u, mpn_v, mzr, mz_t = masks
+    mzx = (mu[..., 1:-1, :] | mpm_u[1:-1, :] |
+           mzr[..., 1:-1, 1:] | mzr[..., 1:-1, :-1])
+    mzy = (mv[..., :, 1:-1] | mpn_v[:, 1:-1] |
+           mzr[..., 1:, 1:-1] | mzr[..., :-1, 1:-1])
+    mask = np.broadcast_to(mzx[..., 1:] | mzx[..., :-1] | mzy[..., 1:, :] |
+                           mzy[..., :-1, :] | momegaHz | mz_t, shape).copy()
+    return np.ma.masked_array(w, mask=mask)
 
 
 